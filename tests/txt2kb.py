@@ -1,8 +1,9 @@
 #!/bin/env python3
 import argparse
 import logging
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
 import math
+import os
+import sys
 import torch
 import wikipedia
 from newspaper import Article, ArticleException
@@ -10,6 +11,9 @@ from GoogleNews import GoogleNews
 import IPython
 from pyvis.network import Network
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "txt2kb"))
+import model_registry
+
 def read_text_from_file(file_path):
     with open(file_path, 'r', encoding='utf-8') as file:
         return file.read()
@@ -230,8 +234,7 @@ def from_text_to_kb(text, span_length=128, verbose=False):
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logging.getLogger("urllib3").setLevel(logging.WARNING)
 
-tokenizer = AutoTokenizer.from_pretrained("Babelscape/rebel-large")
-model = AutoModelForSeq2SeqLM.from_pretrained("Babelscape/rebel-large")
+tokenizer, model = model_registry.get_model("Babelscape/rebel-large")
 
 def main():
 
@@ -0,0 +1,65 @@
+#!/bin/env python3
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "txt2kb"))
+import wiki_replay
+import wiki_resolve
+
+TITLE_PARAMS = {"redirects": 1, "prop": "info|pageprops", "inprop": "url",
+                "ppprop": "disambiguation", "action": "query", "format": "json", "formatversion": 2}
+SUMMARY_PARAMS = {"prop": "extracts", "exintro": 1, "explaintext": 1, "exlimit": "max",
+                  "action": "query", "format": "json", "formatversion": 2}
+
+def page(title):
+    return {"title": title, "fullurl": "https://en.wikipedia.org/wiki/" + title.replace(" ", "_")}
+
+def record_fixtures(fixture_dir):
+    """Record one batched title lookup and one summary lookup, as api_get would."""
+    wiki_replay.save_fixture(fixture_dir, dict(TITLE_PARAMS, titles="napoleon Bonaparte|Paris|Mercury|Nowhere"), {
+        "batchcomplete": True,
+        "query": {
+            "normalized": [{"from": "napoleon Bonaparte", "to": "Napoleon Bonaparte"}],
+            "redirects": [{"from": "Napoleon Bonaparte", "to": "Napoleon"}],
+            "pages": [
+                page("Napoleon"),
+                page("Paris"),
+                dict(page("Mercury"), pageprops={"disambiguation": ""}),
+                {"title": "Nowhere", "missing": True}
+            ]
+        }
+    })
+    wiki_replay.save_fixture(fixture_dir, dict(SUMMARY_PARAMS, titles="Napoleon|Paris"), {
+        "batchcomplete": True,
+        "query": {"pages": [dict(page("Napoleon"), extract="Napoleon was a French emperor."),
+                            dict(page("Paris"), extract="Paris is the capital of France.")]}
+    })
+
+def main():
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        record_fixtures(fixture_dir)
+        server = wiki_replay.ReplayServer(fixture_dir).start()
+        wiki_resolve.WIKIPEDIA_API_URL = server.api_url
+        try:
+            # batched differently from the recording
+            resolved = wiki_resolve.resolve_titles(["Nowhere", "napoleon Bonaparte"])
+            resolved.update(wiki_resolve.resolve_titles(["Mercury", "Paris"]))
+            summaries = wiki_resolve.fetch_summaries(["Paris"])
+            unrecorded = wiki_resolve.resolve_titles(["Unrecorded"])
+        finally:
+            server.stop()
+
+    assert resolved["napoleon Bonaparte"] == {"title": "Napoleon",
+                                              "url": "https://en.wikipedia.org/wiki/Napoleon"}, resolved
+    assert resolved["Paris"]["title"] == "Paris", resolved
+    assert resolved["Mercury"] is None, "disambiguation pages must not resolve"
+    assert resolved["Nowhere"] is None, "missing pages must not resolve"
+    assert summaries == {"Paris": "Paris is the capital of France."}, summaries
+    assert unrecorded == {"Unrecorded": None}
+    assert "Unrecorded" not in wiki_resolve.resolved_titles, "failed lookups must not be cached"
+    assert server.stats["missing_titles"] == 1 and server.stats["errors"] == 0, server.stats
+    print("wiki_resolve replay check passed")
+
+if __name__ == "__main__":
+    main()
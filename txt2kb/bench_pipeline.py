@@ -0,0 +1,89 @@
+#!/bin/env python3
+import argparse
+import configparser
+import json
+import logging
+import os
+import tempfile
+import time
+import pipeline
+import wiki_replay
+
+SCRIPT_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def count_articles(directory_path):
+    count = 0
+    for filename in os.listdir(directory_path):
+        if filename.endswith('.json'):
+            with open(os.path.join(directory_path, filename), 'r', encoding='utf-8') as file:
+                if json.load(file).get('body'):
+                    count += 1
+    return count
+
+def bench_config(corpus_dir, output_dir):
+    """Pipeline configuration reading ``corpus_dir`` and writing under ``output_dir``."""
+    config = configparser.ConfigParser()
+    config["directories"] = {
+        "articles_directory": corpus_dir,
+        "txt2kb": os.path.join(output_dir, "txt2kb"),
+        "txt2kb_combined": os.path.join(output_dir, "combined"),
+        "txt2kb_converted": os.path.join(output_dir, "converted")
+    }
+    config["scripts"] = {
+        "process_script": os.path.join(SCRIPT_DIRECTORY, "process.py"),
+        "multiday_script": os.path.join(SCRIPT_DIRECTORY, "combined", "rolling.py"),
+        "convert_script": os.path.join(SCRIPT_DIRECTORY, "converted", "convert.py")
+    }
+    for directory in config["directories"].values():
+        os.makedirs(directory, exist_ok=True)
+    return config
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a fixed article corpus through the full pipeline (process, rolling multiday, convert) against recorded Wikipedia responses and report throughput.')
+    parser.add_argument('corpus_dir', type=str, help='Directory of article JSON files')
+    parser.add_argument('fixture_dir', type=str, help='Directory of recorded Wikipedia responses')
+    parser.add_argument('--record', action='store_true', help='Query the real Wikipedia API and record its responses into fixture_dir')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every replayed response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Maximum random seconds added on top of --latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of replayed requests answered with a 503')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for latency jitter and error injection')
+    parser.add_argument('--decoding', choices=['beam', 'tiered'], default='beam', help='Decoding mode passed to process.py')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of process.py calls sharing the articles')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    # every stage runs as a subprocess and picks the Wikipedia endpoint up from the environment
+    server = None
+    if args.record:
+        os.environ["TXT2KB_WIKIPEDIA_RECORD"] = os.path.abspath(args.fixture_dir)
+    else:
+        server = wiki_replay.ReplayServer(args.fixture_dir, latency=args.latency, jitter=args.jitter,
+                                          error_rate=args.error_rate, seed=args.seed).start()
+        os.environ["TXT2KB_WIKIPEDIA_API"] = server.api_url
+
+    corpus_dir = os.path.abspath(args.corpus_dir)
+    num_articles = count_articles(corpus_dir)
+    with tempfile.TemporaryDirectory() as output_dir:
+        config = bench_config(corpus_dir, output_dir)
+        stages = pipeline.build_stages(config, time.strftime("%Y%m%d"),
+                                       process_args=["--decoding", args.decoding], jobs=args.jobs)
+        runner = pipeline.Pipeline(stages, os.path.join(output_dir, pipeline.STATE_FILE), jobs=args.jobs)
+        try:
+            start = time.perf_counter()
+            runner.run()
+            elapsed = time.perf_counter() - start
+        finally:
+            if server:
+                server.stop()
+
+    print(f"{num_articles} articles through the full pipeline in {elapsed:.1f}s: "
+          f"{num_articles / elapsed * 60:.2f} articles/min")
+    if server:
+        print(f"Wikipedia stand-in: {server.stats['requests']} requests, "
+              f"{server.stats['errors']} injected errors, {server.stats['misses']} unrecorded "
+              f"({server.stats['missing_titles']} titles); "
+              f"injected errors are retried by the stages, lookups that still fail drop their relations")
+
+if __name__ == "__main__":
+    main()
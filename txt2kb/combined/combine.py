@@ -1,5 +1,6 @@
 #!/bin/env python3
 
+import argparse
 from pyvis.network import Network
 import re
 import glob
@@ -42,7 +43,7 @@ def combine_networks(html_files):
                 unique_edges.add(edge_tuple)
     return combined_nodes, combined_edges
 
-def create_combined_network(nodes, edges, output_html='combined_network.html'):
+def create_combined_network(nodes, edges, output_html=None):
     net = Network(directed=True, width="3000px", height="2000px", bgcolor="#333333")
 
     # Customize node appearance
@@ -83,18 +84,25 @@ def create_combined_network(nodes, edges, output_html='combined_network.html'):
         edge.pop('from', None)
         edge.pop('to', None)
         net.add_edge(from_id, to_id, **edge)
-    # Get current date and time
-    current_datetime = datetime.now().strftime("%Y%m%d_%H%M%S")
-    # Update output file name with date and time
-    output_html = f"multiday_network_{current_datetime}.html"
+    if output_html is None:
+        # Get current date and time
+        current_datetime = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Update output file name with date and time
+        output_html = f"multiday_network_{current_datetime}.html"
     net.save_graph(output_html)
     print(f"Network visualization saved to {output_html}.")
 
-# Assuming all your HTML files are in the same directory
-html_files = glob.glob('/home/davtan/code/txt2kb/txt2kb/combined/*.html')
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Combine daily network HTML files into the multiday network.')
+    parser.add_argument('html_files', type=str, nargs='*', help='Daily network HTML files (default: all HTML files in the combined directory)')
+    parser.add_argument('--output', type=str, default=None, help='Output HTML file (default: timestamped name)')
+    args = parser.parse_args()
 
-# Combining data from all HTML files
-combined_nodes, combined_edges = combine_networks(html_files)
+    # Assuming all your HTML files are in the same directory
+    html_files = args.html_files or glob.glob('/home/davtan/code/txt2kb/txt2kb/combined/*.html')
 
-# Creating and saving the combined network
-create_combined_network(combined_nodes, combined_edges)
+    # Combining data from all HTML files
+    combined_nodes, combined_edges = combine_networks(html_files)
+
+    # Creating and saving the combined network
+    create_combined_network(combined_nodes, combined_edges, args.output)
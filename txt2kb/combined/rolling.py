@@ -0,0 +1,198 @@
+#!/bin/env python3
+import argparse
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta
+from combine import create_combined_network
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import wiki_resolve
+
+
+def relation_key(r):
+    return f"{r['head']}\t{r['type']}\t{r['tail']}"
+
+def publish_day(publish_date, default_day):
+    """Return the ISO day of an article publish date, or ``default_day``."""
+    if publish_date:
+        try:
+            return datetime.fromisoformat(str(publish_date)[:10]).date().isoformat()
+        except ValueError:
+            pass
+    return default_day
+
+
+class RollingKB():
+    """Multiday KB restricted to the sources published in the last N days.
+
+    Every relation keeps one entry per supporting source in ``meta`` and each
+    source remembers which relations it supports, so evicting a day only
+    touches the relations of the sources published that day.
+    """
+    def __init__(self, window_days=7):
+        self.window_days = window_days
+        self.relations = {}        # { relation_key: relation }
+        self.entities = {}         # { title: {...} }
+        self.entity_refs = {}      # { title: number of relations using it }
+        self.sources = {}          # { article_url: {..., "day": ...} }
+        self.source_relations = {} # { article_url: [relation_key, ...] }
+        self.sources_by_day = {}   # { day: [article_url, ...] }
+
+    def cutoff_day(self, as_of):
+        return (date.fromisoformat(as_of) - timedelta(days=self.window_days - 1)).isoformat()
+
+    def add_source(self, article_url, source_data, day):
+        self.sources[article_url] = dict(source_data, day=day)
+        self.source_relations[article_url] = []
+        self.sources_by_day.setdefault(day, []).append(article_url)
+
+    def add_kb(self, kb_data, as_of, ingest_day=None):
+        """Add the relations of a saved KB whose sources fall inside the window.
+
+        Sources without a usable publish date are dated ``ingest_day`` (the
+        day the KB was written), so they age out like the others. A source
+        already in the window was reprocessed: its previous relations are
+        replaced by the ones of this KB.
+        """
+        cutoff = self.cutoff_day(as_of)
+        for article_url, source_data in kb_data["sources"].items():
+            if article_url in self.sources:
+                self.remove_source(article_url)
+            day = publish_day(source_data.get("article_publish_date"), ingest_day or as_of)
+            if day >= cutoff:
+                self.add_source(article_url, source_data, day)
+
+        for r in kb_data["relations"]:
+            key = relation_key(r)
+            for article_url, source_meta in r["meta"].items():
+                if article_url not in self.sources:
+                    continue
+                if key not in self.relations:
+                    self.relations[key] = {"head": r["head"], "type": r["type"],
+                                           "tail": r["tail"], "meta": {}}
+                    for title in (r["head"], r["tail"]):
+                        self.entities[title] = kb_data["entities"].get(title, {})
+                        self.entity_refs[title] = self.entity_refs.get(title, 0) + 1
+                meta = self.relations[key]["meta"]
+                if article_url not in meta:
+                    meta[article_url] = {"spans": list(source_meta["spans"])}
+                    self.source_relations[article_url].append(key)
+                else:
+                    meta[article_url]["spans"] += [span for span in source_meta["spans"]
+                                                   if span not in meta[article_url]["spans"]]
+
+    def remove_source(self, article_url):
+        """Drop a source and the relations it was the only support of; returns their number."""
+        removed = 0
+        day = self.sources.pop(article_url)["day"]
+        self.sources_by_day[day].remove(article_url)
+        if not self.sources_by_day[day]:
+            del self.sources_by_day[day]
+        for key in self.source_relations.pop(article_url):
+            r = self.relations[key]
+            del r["meta"][article_url]
+            if not r["meta"]:
+                del self.relations[key]
+                removed += 1
+                for title in (r["head"], r["tail"]):
+                    self.entity_refs[title] -= 1
+                    if self.entity_refs[title] == 0:
+                        del self.entity_refs[title]
+                        del self.entities[title]
+        return removed
+
+    def evict(self, as_of):
+        """Drop the sources older than the window and relations left without support."""
+        cutoff = self.cutoff_day(as_of)
+        evicted = 0
+        for day in [d for d in self.sources_by_day if d < cutoff]:
+            for article_url in list(self.sources_by_day[day]):
+                evicted += self.remove_source(article_url)
+        return evicted
+
+    def enrich_summaries(self):
+        """Fetch Wikipedia summaries for the entities in the window that lack one.
+
+        Only entities that survive into the window are looked up, each once:
+        failed lookups are retried on the next update.
+        """
+        titles = [title for title, data in self.entities.items() if "summary" not in data]
+        for title, summary in wiki_resolve.fetch_summaries(titles).items():
+            self.entities[title]["summary"] = summary
+
+    def to_dict(self):
+        return {
+            "window_days": self.window_days,
+            "entities": self.entities,
+            "relations": list(self.relations.values()),
+            "sources": self.sources
+        }
+
+    @classmethod
+    def from_dict(cls, data, window_days=None):
+        kb = cls(window_days or data["window_days"])
+        kb.entities = data["entities"]
+        for article_url, source_data in data["sources"].items():
+            kb.add_source(article_url, source_data, source_data["day"])
+        for r in data["relations"]:
+            key = relation_key(r)
+            kb.relations[key] = r
+            for article_url in r["meta"]:
+                kb.source_relations[article_url].append(key)
+            for title in (r["head"], r["tail"]):
+                kb.entity_refs[title] = kb.entity_refs.get(title, 0) + 1
+        return kb
+
+    def network_data(self):
+        """Nodes and edges in the pyvis format used by combine.py."""
+        nodes = [{"id": e, "label": e, "shape": "circle"} for e in self.entities]
+        edges = [{"from": r["head"], "to": r["tail"], "title": r["type"], "label": r["type"]}
+                 for r in self.relations.values()]
+        return nodes, edges
+
+
+def load_state(state_path, window_days=None):
+    if not os.path.exists(state_path):
+        return RollingKB(window_days or 7)
+    with open(state_path, 'r', encoding='utf-8') as file:
+        return RollingKB.from_dict(json.load(file), window_days)
+
+def save_state(kb, state_path):
+    with open(state_path + ".tmp", 'w', encoding='utf-8') as file:
+        json.dump(kb.to_dict(), file)
+    os.replace(state_path + ".tmp", state_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Update the rolling multiday KB with new daily KBs and save its network.')
+    parser.add_argument('kb_files', type=str, nargs='*', help='KB JSON files written by process.py')
+    parser.add_argument('--state', type=str, default='rolling_kb.json', help='Path of the rolling KB state file')
+    parser.add_argument('--days', type=int, default=None, help='Window length in days (default: stored value or 7)')
+    parser.add_argument('--as-of', type=str, default=date.today().isoformat(), help='Current day, YYYY-MM-DD')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Network HTML to write, left untouched when the window did not change (default: timestamped file)')
+    args = parser.parse_args()
+
+    kb = load_state(args.state, args.days)
+    relations_before = set(kb.relations)
+    evicted = kb.evict(args.as_of)
+    for kb_file in args.kb_files:
+        # the file date stands in for sources without a publish date
+        ingest_day = date.fromtimestamp(os.path.getmtime(kb_file)).isoformat()
+        with open(kb_file, 'r', encoding='utf-8') as file:
+            kb.add_kb(json.load(file), args.as_of, ingest_day)
+    kb.enrich_summaries()
+    save_state(kb, args.state)
+    print(f"Rolling KB: {len(kb.relations)} relations from {len(kb.sources)} sources "
+          f"({evicted} relations evicted).")
+
+    # an unchanged network keeps its mtime, so later stages see nothing new
+    if args.output and os.path.exists(args.output) and set(kb.relations) == relations_before:
+        print(f"No relations added or removed, keeping {args.output}.")
+        return
+    nodes, edges = kb.network_data()
+    create_combined_network(nodes, edges, args.output)
+
+if __name__ == '__main__':
+    main()
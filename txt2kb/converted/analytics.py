@@ -0,0 +1,145 @@
+import numpy as np
+from collections import Counter
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+NODE_FIELDS = ["id", "label", "color", "shape"]
+LINK_FIELDS = ["source", "target", "label", "title", "arrows"]
+
+
+class GraphAnalytics():
+    """Degree, PageRank, components and relation-type counts of an exported graph.
+
+    Nodes and links use the format written by convert.py. ``merge`` adds new
+    nodes and links: degrees and type counts are updated for the new links
+    only, and PageRank restarts from the previous ranks so a small merge
+    converges in a few iterations.
+    """
+    def __init__(self, damping=0.85, tol=1e-8, max_iter=100):
+        self.damping = damping
+        self.tol = tol
+        self.max_iter = max_iter
+        self.nodes = []
+        self.links = []
+        self.node_index = {}   # { node_id: position in self.nodes }
+        self.link_keys = set()
+        self.sources = np.zeros(0, dtype=np.int64)
+        self.targets = np.zeros(0, dtype=np.int64)
+        self.in_degree = np.zeros(0, dtype=np.int64)
+        self.out_degree = np.zeros(0, dtype=np.int64)
+        self.pagerank = np.zeros(0)
+        self.components = np.zeros(0, dtype=np.int64)
+        self.num_components = 0
+        self.type_counts = Counter()
+
+    def add_node(self, node):
+        self.node_index[node["id"]] = len(self.nodes)
+        self.nodes.append({k: node[k] for k in NODE_FIELDS if k in node})
+
+    def add(self, nodes, links):
+        """Add unseen nodes and links, updating degrees and type counts for them only."""
+        num_old_nodes = len(self.nodes)
+        for node in nodes:
+            if node["id"] not in self.node_index:
+                self.add_node(node)
+
+        new_sources, new_targets = [], []
+        for link in links:
+            key = (link["source"], link["target"], link["label"])
+            if key in self.link_keys:
+                continue
+            self.link_keys.add(key)
+            for endpoint in (link["source"], link["target"]):
+                if endpoint not in self.node_index:
+                    self.add_node({"id": endpoint, "label": endpoint})
+            self.links.append({k: link[k] for k in LINK_FIELDS if k in link})
+            new_sources.append(self.node_index[link["source"]])
+            new_targets.append(self.node_index[link["target"]])
+            self.type_counts[link["label"]] += 1
+
+        num_added = len(self.nodes) - num_old_nodes
+        new_sources = np.asarray(new_sources, dtype=np.int64)
+        new_targets = np.asarray(new_targets, dtype=np.int64)
+        self.sources = np.concatenate([self.sources, new_sources])
+        self.targets = np.concatenate([self.targets, new_targets])
+        self.in_degree = np.concatenate([self.in_degree, np.zeros(num_added, dtype=np.int64)])
+        self.out_degree = np.concatenate([self.out_degree, np.zeros(num_added, dtype=np.int64)])
+        np.add.at(self.in_degree, new_targets, 1)
+        np.add.at(self.out_degree, new_sources, 1)
+
+    def refresh(self, start):
+        """Recompute components and PageRank, iterating from the ``start`` ranks."""
+        if not self.nodes:
+            return
+        adjacency = self.adjacency()
+        self.num_components, self.components = connected_components(adjacency, directed=True, connection='weak')
+        self.pagerank = self.compute_pagerank(adjacency, start)
+
+    def merge(self, nodes, links):
+        """Merge nodes and links into the graph and refresh the analytics."""
+        num_old_nodes = len(self.nodes)
+        self.add(nodes, links)
+        num_nodes = len(self.nodes)
+        self.refresh(np.concatenate([self.pagerank, np.full(num_nodes - num_old_nodes, 1.0 / max(num_nodes, 1))]))
+
+    def adjacency(self):
+        num_nodes = len(self.nodes)
+        return csr_matrix((np.ones(len(self.sources)), (self.sources, self.targets)),
+                          shape=(num_nodes, num_nodes))
+
+    def compute_pagerank(self, adjacency, start):
+        num_nodes = adjacency.shape[0]
+        out_weight = np.asarray(adjacency.sum(axis=1)).ravel()
+        dangling = out_weight == 0
+        inv_out = np.divide(1.0, out_weight, out=np.zeros(num_nodes), where=~dangling)
+        transposed = adjacency.T.tocsr()
+        rank = start / start.sum()
+        for _ in range(self.max_iter):
+            previous = rank
+            rank = self.damping * (transposed @ (previous * inv_out))
+            rank += (self.damping * previous[dangling].sum() + 1.0 - self.damping) / num_nodes
+            if np.abs(rank - previous).sum() < num_nodes * self.tol:
+                break
+        return rank
+
+    def to_json(self):
+        """Nodes and links with their analytics attributes, plus graph-wide stats."""
+        nodes = [dict(node,
+                      degree=int(self.in_degree[i] + self.out_degree[i]),
+                      in_degree=int(self.in_degree[i]),
+                      out_degree=int(self.out_degree[i]),
+                      pagerank=float(self.pagerank[i]),
+                      component=int(self.components[i]))
+                 for i, node in enumerate(self.nodes)]
+        links = [dict(link, type_count=self.type_counts[link["label"]]) for link in self.links]
+        component_sizes = np.bincount(self.components, minlength=self.num_components)
+        return {
+            "nodes": nodes,
+            "links": links,
+            "stats": {
+                "num_nodes": len(nodes),
+                "num_links": len(links),
+                "num_components": int(self.num_components),
+                "largest_component": int(component_sizes.max()) if len(component_sizes) else 0,
+                "relation_types": dict(self.type_counts.most_common())
+            }
+        }
+
+    @classmethod
+    def from_json(cls, json_data):
+        """Rebuild from a previous export, taking its PageRank and components as they are.
+
+        Nothing is recomputed here: ``merge`` refreshes the analytics once,
+        starting from the stored ranks.
+        """
+        analytics = cls()
+        analytics.add(json_data["nodes"], json_data["links"])
+        analytics.pagerank = np.full(len(analytics.nodes), 1.0 / max(len(analytics.nodes), 1))
+        analytics.components = np.zeros(len(analytics.nodes), dtype=np.int64)
+        for node in json_data["nodes"]:
+            i = analytics.node_index[node["id"]]
+            if node.get("pagerank"):
+                analytics.pagerank[i] = node["pagerank"]
+            analytics.components[i] = node.get("component", 0)
+        analytics.num_components = json_data.get("stats", {}).get("num_components", 0)
+        return analytics
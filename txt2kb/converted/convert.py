@@ -1,7 +1,9 @@
+import argparse
 import json
 import re
-import sys
 from datetime import datetime
+from analytics import GraphAnalytics
+from sharded import export_sharded
 
 def extract_data_from_html(html_file):
     with open(html_file, 'r') as file:
@@ -55,21 +57,50 @@ def save_json_to_file(json_data, output_file):
     with open(output_file, 'w') as file:
         json.dump(json_data, file, indent=2)
 
-def main(html_file):
+def add_analytics(json_data, previous_json=None):
+    """Attach degree, PageRank, component and relation-type counts to the graph.
+
+    With ``previous_json`` (an earlier export) the graph is merged into it and
+    the analytics are updated from the previous values instead of from scratch.
+    Merging only adds nodes and links, so it must not be used on the rolling
+    multiday network: relations evicted from the window would stay in the export.
+    """
+    if previous_json:
+        with open(previous_json, 'r') as file:
+            analytics = GraphAnalytics.from_json(json.load(file))
+    else:
+        analytics = GraphAnalytics()
+    analytics.merge(json_data["nodes"], json_data["links"])
+    return analytics.to_json()
+
+def main(html_file, previous_json=None, output_file=None, sharded_dir=None, columnar=True):
     nodes, edges = extract_data_from_html(html_file)
     json_data = convert_to_json(nodes, edges)
+    json_data = add_analytics(json_data, previous_json)
 
-    # Generate the output JSON file name based on the current date and time
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    output_file = f"multiday_network_{timestamp}.json"
+    if output_file is None:
+        # Generate the output JSON file name based on the current date and time
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        output_file = f"multiday_network_{timestamp}.json"
 
     save_json_to_file(json_data, output_file)
     print(f'Conversion completed. JSON data saved to {output_file}.')
 
+    if sharded_dir:
+        manifest = export_sharded(json_data, sharded_dir, columnar=columnar)
+        print(f'Sharded export of {manifest["num_nodes"]} nodes saved to {sharded_dir}.')
+
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print('Usage: python script.py <input_html_file>')
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='Convert a network HTML file to JSON with graph analytics.')
+    parser.add_argument('html_file', type=str, help='Network HTML file written by pyvis')
+    parser.add_argument('--merge-into', type=str, default=None,
+                        help='Previous JSON export to merge this network into, updating its analytics (only adds: not for the rolling multiday network)')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Output JSON file (default: timestamped name)')
+    parser.add_argument('--sharded', type=str, default=None,
+                        help='Also write the integer-ID manifest/nodes/links/shards export to this directory')
+    parser.add_argument('--rows', action='store_true',
+                        help='Write the sharded link list as [source, target, type] rows instead of columns')
+    args = parser.parse_args()
 
-    html_file = sys.argv[1]
-    main(html_file)
+    main(args.html_file, args.merge_into, args.output, args.sharded, columnar=not args.rows)
@@ -0,0 +1,106 @@
+import json
+import os
+import shutil
+
+FORMAT_VERSION = 1
+# Nodes listed in the manifest so a client can render before loading shards
+TOP_NODES = 50
+COMPACT = (',', ':')
+
+
+def encode_column(values):
+    """Dictionary-encode a string column when it repeats a few values (colors, shapes).
+
+    Numeric columns (degree, pagerank, ...) are kept as plain lists so a
+    client never has to guess whether a list of integers holds codes.
+    """
+    if not all(isinstance(v, str) for v in values):
+        return values
+    distinct = list(dict.fromkeys(values))
+    if len(values) > 1 and len(distinct) * 2 <= len(values):
+        codes = {v: i for i, v in enumerate(distinct)}
+        return {"values": distinct, "codes": [codes[v] for v in values]}
+    return values
+
+def node_table(nodes):
+    """Columnar node table; a node's integer ID is its row number."""
+    columns = list(dict.fromkeys(k for node in nodes for k in node if k != "id"))
+    table = {"name": [node["id"] for node in nodes]}
+    for column in columns:
+        values = [node.get(column) for node in nodes]
+        # pyvis labels default to the node id, no need to ship them twice
+        if values == table["name"]:
+            continue
+        table[column] = encode_column(values)
+    return table
+
+def link_table(links, node_ids, types, columnar=True):
+    """Links as integer node IDs and relation type codes.
+
+    Edge titles repeat the label and arrows are always "to", so neither is kept.
+    """
+    rows = [[node_ids[link["source"]], node_ids[link["target"]], types[link["label"]]]
+            for link in links]
+    if not columnar:
+        return {"rows": rows}
+    return {
+        "source": [row[0] for row in rows],
+        "target": [row[1] for row in rows],
+        "type": [row[2] for row in rows]
+    }
+
+def write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, separators=COMPACT)
+
+def export_sharded(json_data, output_dir, columnar=True):
+    """Write a graph from convert.py as a manifest, tables and per-entity shards.
+
+    ``output_dir`` gets ``nodes.json`` (columnar node table), ``links.json``
+    (links referencing node rows and relation types), ``shards/<id>.json``
+    (the links touching one entity, as ``[source, target, type]`` rows, with
+    the labels of the entity and its neighbours) and a small ``manifest.json``
+    describing the layout and labelling the top nodes, so a client can draw a
+    neighbourhood without loading the node table.
+    """
+    nodes, links = json_data["nodes"], json_data["links"]
+    labels = [node.get("label", node["id"]) for node in nodes]
+    node_ids = {node["id"]: i for i, node in enumerate(nodes)}
+    type_names = list(dict.fromkeys(link["label"] for link in links))
+    types = {name: i for i, name in enumerate(type_names)}
+
+    # shards of entities that are gone from the graph must not survive a re-export
+    shutil.rmtree(os.path.join(output_dir, "shards"), ignore_errors=True)
+    os.makedirs(os.path.join(output_dir, "shards"))
+    write_json(os.path.join(output_dir, "nodes.json"), node_table(nodes))
+    write_json(os.path.join(output_dir, "links.json"),
+               dict(link_table(links, node_ids, types, columnar), types=type_names))
+
+    neighbourhoods = [[] for _ in nodes]
+    for row in link_table(links, node_ids, types, columnar=False)["rows"]:
+        neighbourhoods[row[0]].append(row)
+        if row[1] != row[0]:
+            neighbourhoods[row[1]].append(row)
+    for node_id, rows in enumerate(neighbourhoods):
+        neighbours = sorted({n for row in rows for n in row[:2]} - {node_id})
+        write_json(os.path.join(output_dir, "shards", f"{node_id}.json"),
+                   {"node": node_id, "label": labels[node_id], "neighbours": neighbours,
+                    "neighbour_labels": [labels[n] for n in neighbours], "links": rows})
+
+    ranked = sorted(range(len(nodes)), key=lambda i: nodes[i].get("pagerank", 0), reverse=True)[:TOP_NODES]
+    manifest = {
+        "version": FORMAT_VERSION,
+        "num_nodes": len(nodes),
+        "num_links": len(links),
+        "nodes": "nodes.json",
+        "links": "links.json",
+        "links_layout": "columnar" if columnar else "rows",
+        "directed": True,
+        "shards": "shards/{id}.json",
+        "types": type_names,
+        "top_nodes": ranked,
+        "top_node_labels": [labels[i] for i in ranked],
+        "stats": json_data.get("stats", {})
+    }
+    write_json(os.path.join(output_dir, "manifest.json"), manifest)
+    return manifest
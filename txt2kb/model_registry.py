@@ -0,0 +1,142 @@
+import json
+import logging
+import os
+import resource
+import struct
+import threading
+import time
+import torch
+from transformers import AutoConfig, AutoModelForSeq2SeqLM, AutoTokenizer, GenerationConfig
+
+DEFAULT_MODEL = "Babelscape/rebel-large"
+# Where converted safetensors weights are kept for models that do not publish them
+CACHE_DIRECTORY = os.environ.get("TXT2KB_MODEL_CACHE",
+                                 os.path.join(os.path.expanduser("~"), ".cache", "txt2kb"))
+
+SAFETENSORS_DTYPES = {
+    "F64": torch.float64, "F32": torch.float32, "F16": torch.float16, "BF16": torch.bfloat16,
+    "I64": torch.int64, "I32": torch.int32, "I16": torch.int16, "I8": torch.int8,
+    "U8": torch.uint8, "BOOL": torch.bool
+}
+
+lock = threading.Lock()
+models = {}   # { model name: (tokenizer, model) }
+metrics = {}  # { model name: {...} }
+
+
+def memory_usage():
+    """Resident memory of this process in MB, split into file-backed and anonymous pages."""
+    usage = {}
+    try:
+        with open("/proc/self/status", 'r') as file:
+            for line in file:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "RssAnon", "RssFile"):
+                    usage[key] = int(value.split()[0]) / 1024
+    except OSError:
+        # no /proc: ru_maxrss (KB on Linux) is the peak, not the current, RSS
+        usage["PeakRSS"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return usage
+
+
+def safetensors_file(name):
+    """Path of the model weights in safetensors format, converting them once if needed."""
+    if os.path.isfile(os.path.join(name, "model.safetensors")):
+        return os.path.join(name, "model.safetensors")
+    try:
+        from huggingface_hub import hf_hub_download
+        return hf_hub_download(name, "model.safetensors")
+    except Exception as e:
+        logging.info(f"No published safetensors weights for {name}: {e}")
+    path = os.path.join(CACHE_DIRECTORY, name.replace("/", "--") + ".safetensors")
+    if not os.path.exists(path):
+        from safetensors.torch import save_model
+        logging.info(f"Converting {name} weights to {path}")
+        os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+        save_model(AutoModelForSeq2SeqLM.from_pretrained(name), path + ".tmp")
+        os.replace(path + ".tmp", path)
+    return path
+
+def load_safetensors_mmap(path):
+    """Tensors of a safetensors file as views into one read-only file mapping.
+
+    Nothing is copied: the pages come from the page cache and are shared by
+    every process mapping the same file, as long as the weights are not written.
+    """
+    with open(path, 'rb') as file:
+        header_size = struct.unpack('<Q', file.read(8))[0]
+        header = json.loads(file.read(header_size))
+    header.pop("__metadata__", None)
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+    data = torch.empty(0, dtype=torch.uint8).set_(storage)
+    data_start = 8 + header_size
+    tensors = {}
+    for name, info in header.items():
+        begin, end = info["data_offsets"]
+        tensor = data[data_start + begin:data_start + end].view(SAFETENSORS_DTYPES[info["dtype"]])
+        tensors[name] = tensor.view(info["shape"])
+    return tensors
+
+def load_model_mmap(name):
+    config = AutoConfig.from_pretrained(name)
+    with torch.device("meta"):
+        model = AutoModelForSeq2SeqLM.from_config(config)
+    model.load_state_dict(load_safetensors_mmap(safetensors_file(name)), strict=False, assign=True)
+    # shared embeddings are stored once in safetensors
+    model.tie_weights()
+    if any(t.is_meta for t in list(model.parameters()) + list(model.buffers())):
+        raise ValueError(f"safetensors weights for {name} do not cover the whole model")
+    try:
+        model.generation_config = GenerationConfig.from_pretrained(name)
+    except OSError:
+        pass
+    return model
+
+
+def get_model(name=DEFAULT_MODEL, mmap_weights=True):
+    """Return the process-wide (tokenizer, model) pair for ``name``.
+
+    The first call loads the model, with its weights memory-mapped from a
+    safetensors file when ``mmap_weights`` is set (falling back to a regular
+    load otherwise), and records load time and memory in ``metrics``. Later
+    calls return the same instances.
+    """
+    with lock:
+        if name in models:
+            return models[name]
+        start = time.perf_counter()
+        memory_before = memory_usage()
+        tokenizer = AutoTokenizer.from_pretrained(name)
+        model = None
+        if mmap_weights:
+            try:
+                model = load_model_mmap(name)
+            except Exception as e:
+                # e.g. torch < 2.1 has no torch.device context or assign=True
+                logging.warning(f"Memory-mapped load of {name} failed, loading a private copy: {e}")
+        mmapped = model is not None
+        if model is None:
+            model = AutoModelForSeq2SeqLM.from_pretrained(name)
+        model.eval()
+        model.requires_grad_(False)
+        memory_after = memory_usage()
+        metrics[name] = {
+            "load_seconds": time.perf_counter() - start,
+            "mmap_weights": mmapped,
+            "memory_before_mb": memory_before,
+            "memory_after_mb": memory_after
+        }
+        logging.info(f"Loaded {name} in {metrics[name]['load_seconds']:.1f}s, "
+                     f"RSS {memory_after.get('VmRSS', memory_after.get('PeakRSS', 0)):.0f} MB "
+                     f"({memory_after.get('RssFile', 0):.0f} MB file-backed)")
+        models[name] = (tokenizer, model)
+        return models[name]
+
+def registry_metrics():
+    """Load metrics of every model plus the current memory usage of the process."""
+    return {"models": dict(metrics), "memory_mb": memory_usage()}
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    get_model()
+    print(json.dumps(registry_metrics(), indent=2))
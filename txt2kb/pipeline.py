@@ -0,0 +1,223 @@
+#!/bin/env python3
+import argparse
+import configparser
+import glob
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+STATE_FILE = ".pipeline_state.json"
+
+
+class Task():
+    """One unit of work: a command with the files it reads and writes.
+
+    ``key`` is any extra value the result depends on besides the input files
+    (e.g. the day a rolling window ends). Outputs that later stages move away
+    (the per-article networks, once archived) are declared with
+    ``check_outputs=False``: the task is then judged by its recorded inputs only.
+    """
+    def __init__(self, name, inputs, outputs, command=None, cwd=None, key=None, check_outputs=True):
+        self.name = name
+        self.inputs = sorted(inputs)
+        self.outputs = outputs
+        self.command = command
+        self.cwd = cwd
+        self.key = key
+        self.check_outputs = check_outputs
+
+
+class Stage():
+    """A pipeline step; ``make_tasks`` is called only once earlier stages ran."""
+    def __init__(self, name, make_tasks, batch=None):
+        self.name = name
+        self.make_tasks = make_tasks
+        # optional: turns the stale tasks into the commands to run (e.g. a few
+        # process.py calls sharing the stale articles, so each loads the model once)
+        self.batch = batch
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Pipeline():
+    """Runs stages in order, skipping the tasks recorded as done with the same inputs.
+
+    The state file maps each task to the signatures of its inputs (modification
+    time and size, or content hashes), its key and the outputs it wrote.
+    """
+    def __init__(self, stages, state_path, use_hashes=False, jobs=4, force=()):
+        self.stages = stages
+        self.state_path = state_path
+        self.use_hashes = use_hashes
+        self.jobs = jobs
+        self.force = set(force)
+        self.state = {}
+        if os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as file:
+                self.state = json.load(file)
+        self.timings = []
+
+    def signature(self, path):
+        if self.use_hashes:
+            return file_hash(path)
+        stat = os.stat(path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def is_up_to_date(self, task):
+        # a task without outputs (e.g. archiving) always runs
+        if not task.outputs:
+            return False
+        record = self.state.get(task.name)
+        if record is None or record.get("key") != task.key:
+            return False
+        if task.check_outputs and not all(os.path.exists(output) for output in record["outputs"]):
+            return False
+        return record["inputs"] == {path: self.signature(path) for path in task.inputs}
+
+    def record(self, task):
+        self.state[task.name] = {
+            "inputs": {path: self.signature(path) for path in task.inputs},
+            "key": task.key,
+            "outputs": task.outputs
+        }
+
+    def run_command(self, command, cwd):
+        logging.debug(f"Running {' '.join(command)} in {cwd}")
+        subprocess.run(command, cwd=cwd, check=True)
+
+    def run_stage(self, stage):
+        start = time.perf_counter()
+        tasks = stage.make_tasks()
+        stale = [task for task in tasks
+                 if stage.name in self.force or not self.is_up_to_date(task)]
+        if stale:
+            commands = stage.batch(stale) if stage.batch else [(task.command, task.cwd) for task in stale]
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                # list() re-raises the first failed command
+                list(executor.map(lambda c: self.run_command(*c), commands))
+            for task in stale:
+                self.record(task)
+        elapsed = time.perf_counter() - start
+        self.timings.append((stage.name, len(tasks), len(stale), elapsed))
+        logging.info(f"Stage {stage.name}: {len(stale)}/{len(tasks)} tasks run in {elapsed:.2f}s")
+
+    def run(self):
+        try:
+            for stage in self.stages:
+                self.run_stage(stage)
+        finally:
+            with open(self.state_path + ".tmp", 'w', encoding='utf-8') as file:
+                json.dump(self.state, file)
+            os.replace(self.state_path + ".tmp", self.state_path)
+            self.report()
+
+    def report(self):
+        print(f"{'stage':<12} {'tasks':>6} {'run':>6} {'seconds':>9}")
+        for name, num_tasks, num_run, elapsed in self.timings:
+            print(f"{name:<12} {num_tasks:>6} {num_run:>6} {elapsed:>9.2f}")
+        print(f"{'total':<12} {'':>6} {'':>6} {sum(t[3] for t in self.timings):>9.2f}")
+
+
+def build_stages(config, day, archive=False, process_args=(), jobs=1):
+    directories = config["directories"]
+    scripts = config["scripts"]
+    txt2kb_dir = directories["txt2kb"]
+    combined_dir = directories["txt2kb_combined"]
+    converted_dir = directories["txt2kb_converted"]
+    articles_dir = directories.get("articles_directory")
+    python = sys.executable
+    as_of = datetime.strptime(day, "%Y%m%d").date().isoformat()
+    multiday_output = os.path.join(converted_dir, "multiday_network.html")
+
+    def process_tasks():
+        if not articles_dir:
+            return []
+        tasks = []
+        for json_file in glob.glob(os.path.join(articles_dir, "*.json")):
+            basename = os.path.splitext(os.path.basename(json_file))[0]
+            # the networks are archived away and the KBs consumed by the
+            # rolling window, so a processed article is known by its record
+            tasks.append(Task(f"process:{basename}", [json_file],
+                              [os.path.join(txt2kb_dir, f"{basename}_network.html"),
+                               os.path.join(txt2kb_dir, f"{basename}_kb.json")],
+                              check_outputs=False))
+        return tasks
+
+    def process_batch(tasks):
+        # one process.py per job; the memory-mapped weights are shared between them
+        json_files = [t.inputs[0] for t in tasks]
+        return [([python, scripts["process_script"], *process_args] + json_files[i::jobs], txt2kb_dir)
+                for i in range(min(jobs, len(json_files)))]
+
+    def multiday_tasks():
+        # one task per daily KB, so only new KBs are fed to the rolling window,
+        # plus one keyed by the day so the window still moves without new KBs
+        tasks = [Task(f"multiday:{os.path.basename(kb_file)}", [kb_file], [multiday_output])
+                 for kb_file in glob.glob(os.path.join(txt2kb_dir, "*_kb.json"))]
+        tasks.append(Task("multiday:window", [], [multiday_output], key=as_of))
+        return tasks
+
+    def multiday_batch(tasks):
+        kb_files = [t.inputs[0] for t in tasks if t.inputs]
+        return [([python, scripts["multiday_script"], *kb_files,
+                  "--state", os.path.join(combined_dir, "rolling_kb.json"),
+                  "--as-of", as_of, "--output", multiday_output], combined_dir)]
+
+    def convert_tasks():
+        if not os.path.exists(multiday_output):
+            return []
+        output = os.path.splitext(multiday_output)[0] + ".json"
+        # integer-ID tables and per-entity shards next to the monolithic JSON
+        sharded_dir = os.path.splitext(multiday_output)[0]
+        return [Task("convert", [multiday_output], [output, os.path.join(sharded_dir, "manifest.json")],
+                     [python, scripts["convert_script"], multiday_output, "--output", output,
+                      "--sharded", sharded_dir], converted_dir)]
+
+    def archive_tasks():
+        return [Task("archive", [], [], [python, scripts["archive_script"], txt2kb_dir], txt2kb_dir)]
+
+    stages = [
+        Stage("process", process_tasks, batch=process_batch),
+        Stage("multiday", multiday_tasks, batch=multiday_batch),
+        Stage("convert", convert_tasks),
+    ]
+    if archive:
+        stages.append(Stage("archive", archive_tasks))
+    return stages
+
+
+def main():
+    default_config = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "config.ini")
+    parser = argparse.ArgumentParser(description='Run the process, multiday, convert and archive stages, skipping up-to-date work.')
+    parser.add_argument('--config', type=str, default=default_config, help='Path to config.ini')
+    parser.add_argument('--hash', action='store_true', help='Compare input content hashes instead of modification times and sizes')
+    parser.add_argument('--jobs', type=int, default=4, help='Number of commands run concurrently (process.py calls sharing the stale articles)')
+    parser.add_argument('--force', type=str, action='append', default=[], help='Stage to rerun regardless of its outputs (repeatable)')
+    parser.add_argument('--archive', action='store_true', help='Archive dated network HTML files after converting')
+    parser.add_argument('--day', type=str, default=datetime.now().strftime("%Y%m%d"), help='Day the rolling window ends, YYYYMMDD')
+    parser.add_argument('--process-arg', type=str, action='append', default=[], help='Extra argument passed to process.py (repeatable)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    config = configparser.ConfigParser()
+    config.read(args.config)
+
+    stages = build_stages(config, args.day, archive=args.archive, process_args=args.process_arg,
+                          jobs=args.jobs)
+    state_path = os.path.join(config["directories"]["txt2kb"], STATE_FILE)
+    Pipeline(stages, state_path, use_hashes=args.hash, jobs=args.jobs, force=args.force).run()
+
+if __name__ == "__main__":
+    main()
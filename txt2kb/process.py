@@ -2,25 +2,27 @@
 import argparse
 import json
 import logging
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
 import os
 import math
+import multiprocessing
 import torch
-import wikipedia
 import requests
 import IPython
 from urllib.parse import urlparse, parse_qs, quote_plus, unquote
 from IPython.display import HTML
 from pyvis.network import Network
+import model_registry
+import span_filter
+import token_cache
+import wiki_resolve
 
 
 # Initialize logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logging.getLogger("urllib3").setLevel(logging.WARNING)
 
-# Initialize the tokenizer and model
-tokenizer = AutoTokenizer.from_pretrained("Babelscape/rebel-large")
-model = AutoModelForSeq2SeqLM.from_pretrained("Babelscape/rebel-large")
+# Initialize the tokenizer and model, shared with every other user in the process
+tokenizer, model = model_registry.get_model("Babelscape/rebel-large")
 
 
 def read_text_from_file(file_path):
@@ -100,25 +102,15 @@ class KB():
                             if span not in r1["meta"][article_url]["spans"]]
             r1["meta"][article_url]["spans"] += spans_to_add
 
-    def get_wikipedia_data(self, candidate_entity):
-        try:
-            page = wikipedia.page(candidate_entity, auto_suggest=False)
-            entity_data = {
-                "title": page.title,
-                "url": page.url,
-                "summary": page.summary
-            }
-            return entity_data
-        except:
-            return None
-
     def add_entity(self, e):
-        self.entities[e["title"]] = {k:v for k,v in e.items() if k != "title"}
+        self.entities.setdefault(e["title"], {}).update(
+            {k:v for k,v in e.items() if k != "title"})
 
     def add_relation(self, r, article_title, article_publish_date):
         # check on wikipedia
         candidate_entities = [r["head"], r["tail"]]
-        entities = [self.get_wikipedia_data(ent) for ent in candidate_entities]
+        resolved = wiki_resolve.resolve_titles(candidate_entities)
+        entities = [resolved[ent] for ent in candidate_entities]
 
         # if one entity does not exist, stop
         if any(ent is None for ent in entities):
@@ -152,6 +144,17 @@ class KB():
             source_data = kb2.sources[article_url]
             self.add_relation(r, source_data["article_title"],
                               source_data["article_publish_date"])
+        # keep summaries kb2 already fetched
+        for title, data in kb2.entities.items():
+            if title in self.entities and "summary" in data:
+                self.entities[title].setdefault("summary", data["summary"])
+
+    def enrich_summaries(self):
+        """Fetch the Wikipedia summaries of the entities that still lack one."""
+        titles = [title for title, data in self.entities.items() if "summary" not in data]
+        for title, summary in wiki_resolve.fetch_summaries(titles).items():
+            if title in self.entities:
+                self.entities[title]["summary"] = summary
 
     def print(self):
         print("Entities:")
@@ -200,19 +203,27 @@ def from_small_text_to_kb(text, verbose=False):
     return kb
 
 
-def from_text_to_kb(text, article_url, tokenizer, model, span_length=128, article_title=None, article_publish_date=None, verbose=False):
-
-    logging.debug("Starting to process text for KB creation")
-    # tokenize whole text
-    inputs = tokenizer([text], return_tensors="pt")
-
-    # compute span boundaries
-    num_tokens = len(inputs["input_ids"][0])
-    if verbose:
-        print(f"Input has {num_tokens} tokens")
+# Beam search settings used for every span in "beam" decoding
+BEAM_GEN_KWARGS = {
+    "max_length": 256,
+    "length_penalty": 0,
+    "num_beams": 3,
+    "num_return_sequences": 3
+}
+GREEDY_GEN_KWARGS = {
+    "max_length": 256,
+    "num_beams": 1,
+    "num_return_sequences": 1
+}
+# Greedy spans whose mean token log-prob falls below this are re-decoded with beams.
+# Not calibrated yet: pick it from the spans/s, re-decoded share and recall that
+# `bench_decoding.py <articles> --min-logprob ...` reports with the real
+# rebel-large weights, and keep --decoding beam (the default) until then.
+TIERED_MIN_LOGPROB = -0.35
+
+
+def compute_span_boundaries(num_tokens, span_length=128):
     num_spans = math.ceil(num_tokens / span_length)
-    if verbose:
-        print(f"Input has {num_spans} spans")
     overlap = math.ceil((num_spans * span_length - num_tokens) /
                         max(num_spans - 1, 1))
     spans_boundaries = []
@@ -221,30 +232,22 @@ def from_text_to_kb(text, article_url, tokenizer, model, span_length=128, articl
         spans_boundaries.append([start + span_length * i,
                                  start + span_length * (i + 1)])
         start -= overlap
-    if verbose:
-        print(f"Span boundaries are {spans_boundaries}")
+    return spans_boundaries
 
-    # transform input with spans
-    tensor_ids = [inputs["input_ids"][0][boundary[0]:boundary[1]]
+def build_span_inputs(input_ids, spans_boundaries):
+    tensor_ids = [torch.tensor(input_ids[boundary[0]:boundary[1]].tolist(), dtype=torch.long)
                   for boundary in spans_boundaries]
-    tensor_masks = [inputs["attention_mask"][0][boundary[0]:boundary[1]]
-                    for boundary in spans_boundaries]
-    inputs = {
+    return {
         "input_ids": torch.stack(tensor_ids),
-        "attention_mask": torch.stack(tensor_masks)
+        "attention_mask": torch.ones(len(tensor_ids), len(tensor_ids[0]), dtype=torch.long)
     }
 
-    # generate relations
-    num_return_sequences = 3
-    gen_kwargs = {
-        "max_length": 256,
-        "length_penalty": 0,
-        "num_beams": 3,
-        "num_return_sequences": num_return_sequences
-    }
+def beam_decode(inputs, tokenizer, model):
+    """Decode every span with beam search; returns the predictions of each span."""
+    num_return_sequences = BEAM_GEN_KWARGS["num_return_sequences"]
     generated_tokens = model.generate(
         **inputs,
-        **gen_kwargs,
+        **BEAM_GEN_KWARGS,
     )
 
     # decode relations
@@ -252,21 +255,110 @@ def from_text_to_kb(text, article_url, tokenizer, model, span_length=128, articl
     decoded_preds = tokenizer.batch_decode(generated_tokens,
                                            skip_special_tokens=False)
     print("Decoded predictions:", decoded_preds)
+    return [decoded_preds[i:i + num_return_sequences]
+            for i in range(0, len(decoded_preds), num_return_sequences)]
+
+def is_confident_prediction(prediction, mean_logprob, min_logprob=TIERED_MIN_LOGPROB):
+    """Whether a greedy prediction can be kept without re-decoding the span."""
+    relations = extract_relations_from_model_output(prediction)
+    if not relations or mean_logprob < min_logprob:
+        return False
+    # a triplet marker that did not yield a complete relation is a failed parse
+    if prediction.count("<triplet>") > len(relations):
+        return False
+    return all(r["head"] and r["type"] and r["tail"] for r in relations)
+
+def tiered_decode(inputs, tokenizer, model, min_logprob=TIERED_MIN_LOGPROB):
+    """Greedy-decode every span, then beam-decode only the low-confidence ones.
+
+    Returns the predictions of each span and the indices of the spans that
+    were re-decoded with beam search.
+    """
+    outputs = model.generate(
+        **inputs,
+        **GREEDY_GEN_KWARGS,
+        output_scores=True,
+        return_dict_in_generate=True,
+    )
+    transition_scores = model.compute_transition_scores(outputs.sequences, outputs.scores,
+                                                        normalize_logits=True)
+    generated = outputs.sequences[:, -transition_scores.shape[1]:]
+    mask = generated != tokenizer.pad_token_id
+    token_logprobs = torch.where(mask, transition_scores, torch.zeros_like(transition_scores))
+    mean_logprobs = (token_logprobs.sum(dim=1) / mask.sum(dim=1).clamp(min=1)).tolist()
+    greedy_preds = tokenizer.batch_decode(outputs.sequences, skip_special_tokens=False)
+
+    predictions = [[pred] for pred in greedy_preds]
+    redecode = [i for i, (pred, logprob) in enumerate(zip(greedy_preds, mean_logprobs))
+                if not is_confident_prediction(pred, logprob, min_logprob)]
+    logging.info(f"Re-decoding {len(redecode)} of {len(greedy_preds)} spans with beam search")
+    if redecode:
+        beam_inputs = {k: v[redecode] for k, v in inputs.items()}
+        for i, preds in zip(redecode, beam_decode(beam_inputs, tokenizer, model)):
+            predictions[i] = preds
+    return predictions, redecode
+
+def from_text_to_kb(text, article_url, tokenizer, model, span_length=128, article_title=None, article_publish_date=None, verbose=False, span_threshold=span_filter.DEFAULT_THRESHOLD, span_classifier=None, decoding="beam"):
+
+    logging.debug("Starting to process text for KB creation")
+    # tokenize whole text
+    inputs = tokenizer([text], return_tensors="pt")
+
+    return from_token_ids_to_kb(inputs["input_ids"][0], article_url, tokenizer, model,
+                                span_length=span_length, article_title=article_title,
+                                article_publish_date=article_publish_date, verbose=verbose,
+                                span_threshold=span_threshold, span_classifier=span_classifier,
+                                decoding=decoding)
+
+
+def from_token_ids_to_kb(input_ids, article_url, tokenizer, model, span_length=128, article_title=None, article_publish_date=None, verbose=False, span_threshold=span_filter.DEFAULT_THRESHOLD, span_classifier=None, decoding="beam"):
+    """Build a KB from the token IDs of a whole article.
+
+    ``input_ids`` is a 1-D tensor or NumPy array (e.g. a slice of a
+    ``TokenCache``); only the span slices are copied into the model batch.
+    ``decoding`` is "beam" (beam search on every span) or "tiered" (greedy
+    first, beam search only on low-confidence spans). ``span_classifier`` is
+    an optional callable passed to the span pre-filter.
+    """
+    # compute span boundaries
+    num_tokens = len(input_ids)
+    if verbose:
+        print(f"Input has {num_tokens} tokens")
+    spans_boundaries = compute_span_boundaries(num_tokens, span_length)
+    if verbose:
+        print(f"Input has {len(spans_boundaries)} spans")
+        print(f"Span boundaries are {spans_boundaries}")
+
+    # drop spans unlikely to contain relations before generating
+    if span_threshold > 0:
+        span_texts = [tokenizer.decode(input_ids[boundary[0]:boundary[1]].tolist(),
+                                       skip_special_tokens=True)
+                      for boundary in spans_boundaries]
+        kept_spans = span_filter.filter_spans(span_texts, span_threshold, span_classifier)
+        spans_boundaries = [spans_boundaries[i] for i in kept_spans]
+        if not spans_boundaries:
+            logging.info(f"All spans pruned for {article_url}")
+            return KB()
+
+    # generate relations
+    inputs = build_span_inputs(input_ids, spans_boundaries)
+    if decoding == "tiered":
+        span_predictions, _ = tiered_decode(inputs, tokenizer, model)
+    else:
+        span_predictions = beam_decode(inputs, tokenizer, model)
 
     # create kb
     kb = KB()
-    i = 0
-    for sentence_pred in decoded_preds:
-        current_span_index = i // num_return_sequences
-        relations = extract_relations_from_model_output(sentence_pred)
-        for relation in relations:
-            relation["meta"] = {
-                article_url: {
-                    "spans": [spans_boundaries[current_span_index]]
+    for boundary, predictions in zip(spans_boundaries, span_predictions):
+        for sentence_pred in predictions:
+            relations = extract_relations_from_model_output(sentence_pred)
+            for relation in relations:
+                relation["meta"] = {
+                    article_url: {
+                        "spans": [boundary]
+                    }
                 }
-            }
-            kb.add_relation(relation, article_title, article_publish_date)
-        i += 1
+                kb.add_relation(relation, article_title, article_publish_date)
 
     return kb
 
@@ -282,7 +374,25 @@ def save_network_html(kb, filename="network.html"):
     net.save_graph(filename)
     print(f"Network visualization saved to {filename}. Open this file in your web browser to view the network.")
 
-def process_json_file(json_file_path, tokenizer, model):
+def save_kb_json(kb, filename="kb.json"):
+    with open(filename, 'w', encoding='utf-8') as file:
+        json.dump({
+            "entities": kb.entities,
+            "relations": kb.relations,
+            "sources": kb.sources
+        }, file)
+    print(f"Knowledge base saved to {filename}.")
+
+def save_article_kb(kb, json_file_path):
+    # summaries are fetched once the entities reach the rolling multiday KB
+    kb.print()
+    # Generating network visualization for each processed file
+    basename = os.path.splitext(os.path.basename(json_file_path))[0]
+    save_network_html(kb, filename=f"{basename}_network.html")
+    # Keeping the raw kb for the rolling multiday kb
+    save_kb_json(kb, filename=f"{basename}_kb.json")
+
+def process_json_file(json_file_path, tokenizer, model, span_threshold=span_filter.DEFAULT_THRESHOLD, span_classifier=None, decoding="beam"):
     with open(json_file_path, 'r', encoding='utf-8') as file:
         article_data = json.load(file)
 
@@ -295,24 +405,87 @@ def process_json_file(json_file_path, tokenizer, model):
         return
 
     logging.debug(f"Processing {json_file_path}...")
-    kb = from_text_to_kb(text, article_url, tokenizer, model, verbose=True, article_title=article_data.get('title'), article_publish_date=article_data.get('date'))
-    kb.print()
-    # Generating network visualization for each processed file
-    visualization_filename = f"{os.path.splitext(os.path.basename(json_file_path))[0]}_network.html"
-    save_network_html(kb, filename=visualization_filename)
+    kb = from_text_to_kb(text, article_url, tokenizer, model, verbose=True, article_title=article_data.get('title'), article_publish_date=article_data.get('date'), span_threshold=span_threshold, span_classifier=span_classifier, decoding=decoding)
+    save_article_kb(kb, json_file_path)
 
-def process_directory(directory_path, tokenizer, model):
+def process_directory(directory_path, tokenizer, model, span_threshold=span_filter.DEFAULT_THRESHOLD, span_classifier=None, decoding="beam"):
     for filename in os.listdir(directory_path):
         if filename.endswith('.json'):
             json_file_path = os.path.join(directory_path, filename)
-            process_json_file(json_file_path, tokenizer, model)
+            process_json_file(json_file_path, tokenizer, model, span_threshold=span_threshold,
+                              span_classifier=span_classifier, decoding=decoding)
+
+# Per-worker state for process_token_cache, set up by init_cache_worker
+worker_cache = None
+worker_options = {}
+
+def init_cache_worker(cache_dir, options, num_threads):
+    global worker_cache, worker_options
+    # every worker maps the same file, so token pages are shared between them
+    worker_cache = token_cache.TokenCache(cache_dir)
+    worker_options = options
+    torch.set_num_threads(num_threads)
+
+def process_cached_article(i):
+    article = worker_cache.articles[i]
+    logging.debug(f"Processing cached article {article['file']}...")
+    kb = from_token_ids_to_kb(worker_cache.article_tokens(i), article["url"], tokenizer, model,
+                              verbose=True, article_title=article["title"],
+                              article_publish_date=article["date"],
+                              **worker_options)
+    save_article_kb(kb, article["file"])
+
+def process_token_cache(cache_dir, span_threshold=span_filter.DEFAULT_THRESHOLD, span_classifier=None, decoding="beam", workers=1):
+    """Run extraction over a token cache, skipping JSON parsing and tokenization.
+
+    With ``workers > 1`` articles are spread over forked processes that share
+    the model weights copy-on-write and the token array through the mmap.
+    """
+    options = {"span_threshold": span_threshold, "span_classifier": span_classifier, "decoding": decoding}
+    num_threads = max(1, (os.cpu_count() or 1) // workers)
+    if workers <= 1:
+        init_cache_worker(cache_dir, options, torch.get_num_threads())
+        for i in range(len(worker_cache)):
+            process_cached_article(i)
+        return
+    num_articles = len(token_cache.TokenCache(cache_dir))
+    context = multiprocessing.get_context("fork")
+    with context.Pool(workers, initializer=init_cache_worker,
+                      initargs=(cache_dir, options, num_threads)) as pool:
+        pool.map(process_cached_article, range(num_articles), chunksize=1)
 
 def main():
     parser = argparse.ArgumentParser(description='Process a directory of JSON files to extract and visualize knowledge graph.')
-    parser.add_argument('directory_path', type=str, help='Path to the directory containing JSON files')
+    parser.add_argument('paths', type=str, nargs='+', help='Directories containing JSON files, or individual JSON files')
+    parser.add_argument('--span-threshold', type=float, default=span_filter.DEFAULT_THRESHOLD,
+                        help='Minimum pre-filter score for a span to be sent to the model (0 disables the filter)')
+    parser.add_argument('--span-classifier', type=str, default=None,
+                        help='Optional module:function returning the probability that a span holds relations, averaged into the pre-filter score')
+    parser.add_argument('--decoding', choices=['beam', 'tiered'], default='beam',
+                        help='Beam search on every span, or greedy first with beam search only on low-confidence spans')
+    parser.add_argument('--token-cache', type=str, default=None,
+                        help='Directory of a memory-mapped token cache to build (if stale) and extract from')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of extraction processes when using --token-cache')
     args = parser.parse_args()
+    span_classifier = span_filter.load_classifier(args.span_classifier) if args.span_classifier else None
+
+    if args.token_cache:
+        if len(args.paths) != 1 or not os.path.isdir(args.paths[0]):
+            parser.error('--token-cache needs exactly one directory')
+        token_cache.build_token_cache(args.paths[0], tokenizer, args.token_cache)
+        process_token_cache(args.token_cache, span_threshold=args.span_threshold,
+                            span_classifier=span_classifier, decoding=args.decoding,
+                            workers=args.workers)
+        return
 
-    process_directory(args.directory_path, tokenizer, model)
+    for path in args.paths:
+        if os.path.isdir(path):
+            process_directory(path, tokenizer, model, span_threshold=args.span_threshold,
+                              span_classifier=span_classifier, decoding=args.decoding)
+        else:
+            process_json_file(path, tokenizer, model, span_threshold=args.span_threshold,
+                              span_classifier=span_classifier, decoding=args.decoding)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,134 @@
+#!/bin/env python3
+import argparse
+import importlib
+import json
+import logging
+import re
+
+# Spans scoring below this are dropped before generation. Off until a
+# threshold has been picked with evaluate_filter on a labelled sample.
+DEFAULT_THRESHOLD = 0.0
+# Thresholds the evaluation CLI tries when none are given
+CANDIDATE_THRESHOLDS = [0.05, 0.1, 0.15, 0.2]
+
+# Phrases that mark navigation, legal and promo boilerplate
+BOILERPLATE_PATTERNS = [re.compile(p, re.IGNORECASE) for p in [
+    r"\bcookies?\b",
+    r"\bread more\b",
+    r"\bclick here\b",
+    r"\bsubscribe\b",
+    r"\bsign up\b",
+    r"\bnewsletter\b",
+    r"\bprivacy policy\b",
+    r"\bterms of (use|service)\b",
+    r"\ball rights reserved\b",
+    r"\badvertisement\b",
+    r"\bshare (this|on)\b",
+    r"\bfollow us\b",
+    r"\brelated (articles|stories)\b",
+]] + [
+    # bylines: the names must be capitalized, so no IGNORECASE here
+    re.compile(r"^\s*[Bb]y\s+[A-Z][a-z]+\s+[A-Z][a-z]+"),
+]
+
+
+def span_features(text):
+    """Compute the cheap features used to score a span."""
+    tokens = text.split()
+    if not tokens:
+        return {"num_tokens": 0, "capitalized_density": 0.0,
+                "numeric_ratio": 0.0, "boilerplate_hits": 0}
+    words = [t for t in tokens if t[0].isalpha()]
+    capitalized = [w for w in words if w[0].isupper()]
+    numeric = [t for t in tokens
+               if sum(c.isdigit() for c in t) * 2 >= len(t)]
+    return {
+        "num_tokens": len(tokens),
+        "capitalized_density": len(capitalized) / len(words) if words else 0.0,
+        "numeric_ratio": len(numeric) / len(tokens),
+        "boilerplate_hits": sum(1 for p in BOILERPLATE_PATTERNS if p.search(text)),
+    }
+
+
+def score_span(text, classifier=None):
+    """Score a span in [0, 1]; higher means more likely to hold relations.
+
+    Named entities are what REBEL turns into triplets, so the score grows with
+    the density of capitalized tokens and shrinks with numeric tables and
+    boilerplate phrases. An optional ``classifier`` callable returning a
+    probability for the text is averaged in.
+    """
+    features = span_features(text)
+    if features["num_tokens"] == 0:
+        return 0.0
+    score = min(1.0, features["capitalized_density"] * 2)
+    score *= 1.0 - features["numeric_ratio"]
+    score *= 0.5 ** features["boilerplate_hits"]
+    if classifier is not None:
+        score = (score + float(classifier(text))) / 2
+    return score
+
+
+def load_classifier(spec):
+    """Load a span classifier given as ``module:function``."""
+    module_name, _, function_name = spec.partition(":")
+    if not function_name:
+        raise ValueError(f"Span classifier must be given as module:function, got {spec!r}")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def filter_spans(span_texts, threshold=DEFAULT_THRESHOLD, classifier=None):
+    """Return the indices of the spans whose score reaches ``threshold``."""
+    kept = [i for i, text in enumerate(span_texts)
+            if score_span(text, classifier) >= threshold]
+    pruned = len(span_texts) - len(kept)
+    if pruned:
+        logging.info(f"Span pre-filter pruned {pruned} of {len(span_texts)} spans")
+    return kept
+
+
+def evaluate_filter(samples, threshold=DEFAULT_THRESHOLD, classifier=None):
+    """Measure what the filter costs on labelled spans.
+
+    ``samples`` is a list of ``{"text": ..., "relations": [...]}`` records, one
+    per span, where ``relations`` holds the triplets expected from that span.
+    Returns the number of pruned spans and the fraction of labelled relations
+    that sit in kept spans.
+    """
+    kept = set(filter_spans([s["text"] for s in samples], threshold, classifier))
+    total_relations = sum(len(s.get("relations", [])) for s in samples)
+    kept_relations = sum(len(s.get("relations", []))
+                         for i, s in enumerate(samples) if i in kept)
+    recall = kept_relations / total_relations if total_relations else 1.0
+    return {
+        "spans": len(samples),
+        "pruned": len(samples) - len(kept),
+        "relations": total_relations,
+        "relation_recall": recall,
+    }
+
+
+def load_samples(file_path):
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate the span pre-filter on a labelled JSON-lines sample.')
+    parser.add_argument('sample_path', type=str, help='JSON-lines file of {"text", "relations"} span records')
+    parser.add_argument('--threshold', type=float, action='append',
+                        help=f'Threshold to evaluate (repeatable, default {CANDIDATE_THRESHOLDS})')
+    parser.add_argument('--classifier', type=str, default=None,
+                        help='Optional module:function span classifier to evaluate along with the heuristics')
+    args = parser.parse_args()
+
+    classifier = load_classifier(args.classifier) if args.classifier else None
+    samples = load_samples(args.sample_path)
+    for threshold in args.threshold or CANDIDATE_THRESHOLDS:
+        result = evaluate_filter(samples, threshold, classifier)
+        print(f"threshold={threshold:.2f} pruned={result['pruned']}/{result['spans']} "
+              f"relation_recall={result['relation_recall']:.3f} "
+              f"({result['relations']} labelled relations)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/bin/env python3
+import argparse
+import json
+import logging
+import os
+import numpy as np
+
+TOKENS_FILE = "tokens.npy"
+INDEX_FILE = "index.json"
+
+
+def list_article_files(directory_path):
+    return sorted(os.path.join(directory_path, filename)
+                  for filename in os.listdir(directory_path)
+                  if filename.endswith('.json'))
+
+
+def source_signature(file_path):
+    stat = os.stat(file_path)
+    return [os.path.basename(file_path), stat.st_mtime_ns, stat.st_size]
+
+
+def is_cache_current(cache_dir, article_files, tokenizer_name):
+    index_path = os.path.join(cache_dir, INDEX_FILE)
+    if not os.path.exists(index_path) or not os.path.exists(os.path.join(cache_dir, TOKENS_FILE)):
+        return False
+    with open(index_path, 'r', encoding='utf-8') as file:
+        index = json.load(file)
+    return (index.get("tokenizer") == tokenizer_name and
+            index.get("sources") == [source_signature(f) for f in article_files])
+
+
+def build_token_cache(directory_path, tokenizer, cache_dir, force=False):
+    """Tokenize every article JSON in a directory into one memory-mapped array.
+
+    Token IDs of all article bodies are concatenated into ``tokens.npy`` (int32)
+    and ``index.json`` records, per article, its source file, url, title, date
+    and ``[start, end)`` token range. The cache is left untouched when no source
+    file changed since it was written.
+    """
+    article_files = list_article_files(directory_path)
+    tokenizer_name = getattr(tokenizer, "name_or_path", None)
+    if not force and is_cache_current(cache_dir, article_files, tokenizer_name):
+        logging.info(f"Token cache in {cache_dir} is up to date")
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+
+    articles, token_arrays = [], []
+    offset = 0
+    for json_file_path in article_files:
+        with open(json_file_path, 'r', encoding='utf-8') as file:
+            article_data = json.load(file)
+        text = article_data.get('body', "")
+        if not text:
+            logging.warning(f"No content found in 'body' for {json_file_path}. Skipping file.")
+            continue
+        ids = np.asarray(tokenizer([text])["input_ids"][0], dtype=np.int32)
+        token_arrays.append(ids)
+        articles.append({
+            "file": os.path.basename(json_file_path),
+            "url": article_data.get('url', "No URL available"),
+            "title": article_data.get('title'),
+            "date": article_data.get('date'),
+            "start": offset,
+            "end": offset + len(ids)
+        })
+        offset += len(ids)
+
+    # write to temporary files first so readers never see a half-built cache
+    tokens_tmp = os.path.join(cache_dir, TOKENS_FILE + ".tmp")
+    tokens = np.lib.format.open_memmap(tokens_tmp, mode='w+', dtype=np.int32, shape=(offset,))
+    for article, ids in zip(articles, token_arrays):
+        tokens[article["start"]:article["end"]] = ids
+    tokens.flush()
+    del tokens
+    index_tmp = os.path.join(cache_dir, INDEX_FILE + ".tmp")
+    with open(index_tmp, 'w', encoding='utf-8') as file:
+        json.dump({
+            "tokenizer": tokenizer_name,
+            "sources": [source_signature(f) for f in article_files],
+            "articles": articles
+        }, file)
+    os.replace(tokens_tmp, os.path.join(cache_dir, TOKENS_FILE))
+    os.replace(index_tmp, os.path.join(cache_dir, INDEX_FILE))
+    logging.info(f"Cached {offset} tokens from {len(articles)} articles in {cache_dir}")
+
+
+class TokenCache():
+    """Read-only view over a cache written by ``build_token_cache``.
+
+    The token array is opened with ``mmap_mode='r'`` so article slices are views
+    into the page cache, shared by every process that opens the same cache.
+    """
+    def __init__(self, cache_dir):
+        self.tokens = np.load(os.path.join(cache_dir, TOKENS_FILE), mmap_mode='r')
+        with open(os.path.join(cache_dir, INDEX_FILE), 'r', encoding='utf-8') as file:
+            self.articles = json.load(file)["articles"]
+
+    def __len__(self):
+        return len(self.articles)
+
+    def article_tokens(self, i):
+        article = self.articles[i]
+        return self.tokens[article["start"]:article["end"]]
+
+
+def main():
+    from transformers import AutoTokenizer
+
+    parser = argparse.ArgumentParser(description='Pre-tokenize a directory of JSON articles into a memory-mapped token cache.')
+    parser.add_argument('directory_path', type=str, help='Path to the directory containing JSON files')
+    parser.add_argument('cache_dir', type=str, help='Directory to write the token cache to')
+    parser.add_argument('--force', action='store_true', help='Rebuild even if the cache is up to date')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    tokenizer = AutoTokenizer.from_pretrained("Babelscape/rebel-large")
+    build_token_cache(args.directory_path, tokenizer, args.cache_dir, force=args.force)
+
+if __name__ == "__main__":
+    main()
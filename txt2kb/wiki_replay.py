@@ -0,0 +1,183 @@
+#!/bin/env python3
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+
+
+def fixture_key(params):
+    """Stable key of a MediaWiki query, the same for the client and the server."""
+    canonical = json.dumps({str(k): str(v) for k, v in params.items()}, sort_keys=True)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def title_params(params, title):
+    """Parameters of the query for one title, without the batch and continuation."""
+    params = {str(k): str(v) for k, v in params.items()
+              if k != "titles" and not str(k).endswith("continue")}
+    return dict(params, title=title)
+
+def split_response(params, response):
+    """Split a batched ``titles`` response into one fixture per requested title.
+
+    Each fixture keeps the normalization and redirect steps of its title and
+    the page they lead to, so a replay can serve any batch of recorded titles.
+    """
+    query = response.get("query", {})
+    normalized = {item["from"]: item for item in query.get("normalized", [])}
+    redirects = {item["from"]: item for item in query.get("redirects", [])}
+    pages = {page["title"]: page for page in query.get("pages", [])}
+    fixtures = []
+    for title in str(params["titles"]).split("|"):
+        fixture = {"params": title_params(params, title), "normalized": [], "redirects": []}
+        name = title
+        if name in normalized:
+            fixture["normalized"].append(normalized[name])
+            name = normalized[name]["to"]
+        for _ in range(2):
+            if name in redirects:
+                fixture["redirects"].append(redirects[name])
+                name = redirects[name]["to"]
+        fixture["page"] = pages.get(name)
+        fixtures.append(fixture)
+    return fixtures
+
+def save_fixture(fixture_dir, params, response):
+    os.makedirs(fixture_dir, exist_ok=True)
+    for fixture in split_response(params, response):
+        path = os.path.join(fixture_dir, f"{fixture_key(fixture['params'])}.json")
+        if os.path.exists(path):
+            # continued queries return the same page again, with more of its props
+            with open(path, 'r', encoding='utf-8') as file:
+                page = json.load(file)["page"]
+            if page and fixture["page"]:
+                fixture["page"] = dict(page, **fixture["page"])
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(fixture, file)
+
+def load_fixtures(fixture_dir):
+    fixtures = {}
+    for filename in os.listdir(fixture_dir):
+        if filename.endswith('.json'):
+            with open(os.path.join(fixture_dir, filename), 'r', encoding='utf-8') as file:
+                fixture = json.load(file)
+            fixtures[fixture_key(fixture["params"])] = fixture
+    return fixtures
+
+def assemble_response(fixtures):
+    """Rebuild a batched response from the fixtures of its titles."""
+    query = {"normalized": [], "redirects": [], "pages": []}
+    seen_pages = set()
+    for fixture in fixtures:
+        query["normalized"] += fixture["normalized"]
+        query["redirects"] += fixture["redirects"]
+        page = fixture["page"]
+        if page and page["title"] not in seen_pages:
+            seen_pages.add(page["title"])
+            query["pages"].append(page)
+    return {"batchcomplete": True,
+            "query": {key: value for key, value in query.items() if value}}
+
+
+class ReplayServer():
+    """Local stand-in for the Wikipedia API serving recorded responses.
+
+    Every request waits ``latency`` seconds (plus up to ``jitter``) and fails
+    with a 503 with probability ``error_rate``. Batches are answered from the
+    per-title fixtures whatever titles they group; a batch holding a title
+    that was never recorded gets a 404. ``stats`` counts injected errors and
+    unrecorded requests and titles separately.
+    """
+    def __init__(self, fixture_dir, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                 error_rate=0.0, seed=None):
+        self.fixtures = load_fixtures(fixture_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "misses": 0, "missing_titles": 0}
+        self.httpd = ThreadingHTTPServer((host, port), self.make_handler())
+        self.thread = None
+
+    @property
+    def api_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/w/api.php"
+
+    def make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logging.debug(format % args)
+
+            def send_json(self, status, data):
+                body = json.dumps(data).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                params = dict(parse_qsl(urlparse(self.path).query, keep_blank_values=True))
+                with server.lock:
+                    server.stats["requests"] += 1
+                    delay = server.latency + server.random.uniform(0, server.jitter)
+                    fail = server.random.random() < server.error_rate
+                time.sleep(delay)
+                if fail:
+                    with server.lock:
+                        server.stats["errors"] += 1
+                    return self.send_json(503, {"error": "injected failure"})
+                titles = params.get("titles", "").split("|")
+                fixtures = [server.fixtures.get(fixture_key(title_params(params, title)))
+                            for title in titles]
+                missing = [title for title, fixture in zip(titles, fixtures) if fixture is None]
+                if missing:
+                    with server.lock:
+                        server.stats["misses"] += 1
+                        server.stats["missing_titles"] += len(missing)
+                    return self.send_json(404, {"error": "no recorded response", "titles": missing})
+                self.send_json(200, assemble_response(fixtures))
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve recorded Wikipedia API responses with injected latency and errors.')
+    parser.add_argument('fixture_dir', type=str, help='Directory of responses recorded with TXT2KB_WIKIPEDIA_RECORD')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Maximum random seconds added on top of --latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 503')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for latency jitter and error injection')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = ReplayServer(args.fixture_dir, port=args.port, latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, seed=args.seed)
+    print(f"Serving {len(server.fixtures)} recorded titles at {server.api_url}")
+    print(f"Run the pipeline with TXT2KB_WIKIPEDIA_API={server.api_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
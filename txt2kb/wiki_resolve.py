@@ -0,0 +1,111 @@
+import logging
+import os
+import requests
+import time
+import wiki_replay
+
+# Point this at a local stand-in server to run without hitting Wikipedia
+WIKIPEDIA_API_URL = os.environ.get("TXT2KB_WIKIPEDIA_API", "https://en.wikipedia.org/w/api.php")
+# When set, every API response is saved there as a fixture for wiki_replay.py
+RECORD_DIRECTORY = os.environ.get("TXT2KB_WIKIPEDIA_RECORD")
+USER_AGENT = "txt2kb (https://github.com/mrdavtan/txt2kb)"
+# MediaWiki limits: 50 titles per query, 20 intro extracts per query
+TITLES_PER_REQUEST = 50
+SUMMARIES_PER_REQUEST = 20
+# Server errors (5xx) and dropped connections are retried with exponential backoff
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
+
+session = requests.Session()
+session.headers["User-Agent"] = USER_AGENT
+
+# { candidate name: {"title", "url"} or None }, shared by every KB in the process
+resolved_titles = {}
+# { canonical title: intro extract or None }, same lifetime as resolved_titles
+summaries = {}
+
+
+def api_get(params):
+    params = dict(params, action="query", format="json", formatversion=2)
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = session.get(WIKIPEDIA_API_URL, params=params, timeout=30)
+            if response.status_code < 500 or attempt == MAX_RETRIES:
+                break
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == MAX_RETRIES:
+                raise
+        time.sleep(RETRY_BACKOFF * 2 ** attempt)
+    response.raise_for_status()
+    data = response.json()
+    if RECORD_DIRECTORY:
+        wiki_replay.save_fixture(RECORD_DIRECTORY, params, data)
+    return data
+
+def batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def resolve_titles(names):
+    """Map candidate entity names to their canonical Wikipedia title and URL.
+
+    Redirects are followed and names are matched exactly (like
+    ``wikipedia.page(name, auto_suggest=False)``); missing and disambiguation
+    pages resolve to None. Only titles and URLs are fetched, up to 50 names per
+    request, and results are cached for the lifetime of the process.
+    """
+    pending = list(dict.fromkeys(name for name in names if name not in resolved_titles))
+    for batch in batches(pending, TITLES_PER_REQUEST):
+        try:
+            data = api_get({"titles": "|".join(batch), "redirects": 1,
+                            "prop": "info|pageprops", "inprop": "url",
+                            "ppprop": "disambiguation"})
+        except (requests.RequestException, ValueError) as e:
+            logging.warning(f"Wikipedia title lookup failed: {e}")
+            continue
+        query = data.get("query", {})
+        renames = {}
+        for item in query.get("normalized", []) + query.get("redirects", []):
+            renames[item["from"]] = item["to"]
+        pages = {page["title"]: page for page in query.get("pages", [])}
+        for name in batch:
+            title = name
+            for _ in range(3):  # normalized, then redirected
+                title = renames.get(title, title)
+            page = pages.get(title)
+            if (page is None or page.get("missing") or page.get("invalid")
+                    or "disambiguation" in page.get("pageprops", {})):
+                resolved_titles[name] = None
+            else:
+                resolved_titles[name] = {"title": page["title"], "url": page["fullurl"]}
+    return {name: resolved_titles.get(name) for name in names}
+
+def resolve_title(name):
+    return resolve_titles([name])[name]
+
+
+def fetch_summaries(titles):
+    """Fetch the plain-text intro of canonical titles, up to 20 per request.
+
+    Titles fetched before in the process are answered from the cache; titles
+    without an intro are left out of the result.
+    """
+    pending = list(dict.fromkeys(title for title in titles if title not in summaries))
+    for batch in batches(pending, SUMMARIES_PER_REQUEST):
+        params = {"titles": "|".join(batch), "prop": "extracts",
+                  "exintro": 1, "explaintext": 1, "exlimit": "max"}
+        while True:
+            try:
+                data = api_get(params)
+            except (requests.RequestException, ValueError) as e:
+                logging.warning(f"Wikipedia summary lookup failed: {e}")
+                break
+            for page in data.get("query", {}).get("pages", []):
+                # continued queries repeat pages, keep the extract once it came
+                if page.get("extract") or page["title"] not in summaries:
+                    summaries[page["title"]] = page.get("extract")
+            if "continue" not in data:
+                break
+            params = dict(params, **data["continue"])
+    return {title: summaries[title] for title in titles if summaries.get(title)}